@@ -1,21 +1,54 @@
-import json
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import re
+import sys
+from collections.abc import AsyncIterator
 from datetime import date
+from functools import lru_cache
 
-import truststore
-truststore.inject_into_ssl()  # use Windows system certificate store
+import fastjsonschema
+import orjson
 
+if sys.platform == "win32":
+    import truststore
+    truststore.inject_into_ssl()  # use Windows system certificate store
+
+import httpx
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, OpenAIError
 
 load_dotenv()
 
 import todo_service
+from llm_cache import LLMCache, SemanticCache
 from task import TaskStatus, TaskType
 
-client = OpenAI()
+# One pooled HTTP client for the process, so OpenAI calls reuse open TCP/TLS connections.
+# HTTP/2 multiplexes concurrent chats over one connection; it needs the optional h2
+# package (httpx[http2]), so fall back to HTTP/1.1 rather than fail at import.
+# DefaultAsyncHttpxClient keeps the SDK's own timeouts and redirect handling.
+http_client = DefaultAsyncHttpxClient(
+    http2=importlib.util.find_spec("h2") is not None,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+)
+client = AsyncOpenAI(http_client=http_client)
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = (
+    "You are a helpful task management assistant. "
+    "Use the provided tools to manage the user's task list. "
+    "Always respond in clear, friendly language."
+)
 
 # ── Tool schemas ──────────────────────────────────────────────────────────────
 
+# Enum values are computed once and shared by every schema that uses them
+TASK_TYPES = tuple(t.value for t in TaskType)
+TASK_STATUSES = tuple(s.value for s in TaskStatus)
+
 TOOLS = [
     {
         "type": "function",
@@ -39,20 +72,22 @@ TOOLS = [
                     },
                     "type": {
                         "type": "string",
-                        "enum": [t.value for t in TaskType],
+                        "enum": TASK_TYPES,
                         "description": "Type of task.",
                     },
                     "start_date": {
                         "type": "string",
+                        "format": "date",
                         "description": "Start date in YYYY-MM-DD format.",
                     },
                     "due_date": {
                         "type": "string",
+                        "format": "date",
                         "description": "Due date in YYYY-MM-DD format.",
                     },
                     "status": {
                         "type": "string",
-                        "enum": [s.value for s in TaskStatus],
+                        "enum": TASK_STATUSES,
                         "description": "Current status of the task.",
                     },
                 },
@@ -70,12 +105,12 @@ TOOLS = [
                 "properties": {
                     "status": {
                         "type": "string",
-                        "enum": [s.value for s in TaskStatus],
+                        "enum": TASK_STATUSES,
                         "description": "Filter by task status.",
                     },
                     "type": {
                         "type": "string",
-                        "enum": [t.value for t in TaskType],
+                        "enum": TASK_TYPES,
                         "description": "Filter by task type.",
                     },
                     "search": {
@@ -103,19 +138,21 @@ TOOLS = [
                     "description": {"type": "string"},
                     "type": {
                         "type": "string",
-                        "enum": [t.value for t in TaskType],
+                        "enum": TASK_TYPES,
                     },
                     "start_date": {
                         "type": "string",
+                        "format": "date",
                         "description": "New start date in YYYY-MM-DD format.",
                     },
                     "due_date": {
                         "type": "string",
+                        "format": "date",
                         "description": "New due date in YYYY-MM-DD format.",
                     },
                     "status": {
                         "type": "string",
-                        "enum": [s.value for s in TaskStatus],
+                        "enum": TASK_STATUSES,
                     },
                 },
                 "required": ["code"],
@@ -141,17 +178,110 @@ TOOLS = [
     },
 ]
 
+# Hash of the tool schemas, so a schema change never serves a stale reply
+TOOLS_HASH = hashlib.sha256(orjson.dumps(TOOLS, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+# Tools that never change the task list; replies built only from these are cacheable
+READ_ONLY_TOOLS = {"get_tasks"}
+
+# Compiled argument validators, one per tool, so bad calls are rejected before dispatch
+VALIDATORS = {
+    tool["function"]["name"]: fastjsonschema.compile(tool["function"]["parameters"])
+    for tool in TOOLS
+}
+
+# ── Response cache ────────────────────────────────────────────────────────────
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+cache = LLMCache(ttl=3600)
+semantic_cache = SemanticCache(threshold=0.92, ttl=3600)
+
+
+# Words that select different tasks; queries differing in these must never share a reply
+FILTER_WORDS = {
+    "pending": "pending", "open": "pending", "todo": "pending",
+    "in_progress": "in_progress", "progress": "in_progress", "ongoing": "in_progress",
+    "done": "done", "completed": "done", "complete": "done", "finished": "done",
+    "cancelled": "cancelled", "canceled": "cancelled",
+    "bug": "bug", "bugs": "bug",
+    "feature": "feature", "features": "feature",
+    "improvement": "improvement", "improvements": "improvement",
+}
+
+
+def _query_signature(query: str, model: str) -> str:
+    """Return the model plus the task codes, numbers and filter words in the query."""
+    tokens = set()
+    for token in re.findall(r"[a-z0-9_-]+", query.lower()):
+        if any(ch.isdigit() for ch in token):
+            tokens.add(token)
+        elif token in FILTER_WORDS:
+            tokens.add(FILTER_WORDS[token])
+    return "|".join([model, *sorted(tokens)])
+
+
+async def _embed(query: str) -> list[float] | None:
+    """Embed the query for the semantic cache; a failure only means a cache miss."""
+    try:
+        response = await client.embeddings.create(model=EMBEDDING_MODEL, input=query)
+    except OpenAIError:
+        logger.warning("Query embedding failed; skipping semantic cache", exc_info=True)
+        return None
+    return response.data[0].embedding
+
+
+# Bumped on every write; a reply is only cached if no write happened while it was built
+write_generation = 0
+
+
+def _clear_caches() -> None:
+    global write_generation
+    write_generation += 1
+    cache.clear()
+    semantic_cache.clear()
+
+
+def _store_reply(
+    key: str,
+    reply: str,
+    generation: int,
+    embedding: list[float] | None = None,
+    signature: str = "",
+) -> None:
+    """Cache a reply by exact query, and by embedding too when one is given."""
+    if generation != write_generation:
+        return  # a write ran meanwhile, so the reply may describe stale tasks
+    cache.set(key, reply)
+    if embedding is not None:
+        semantic_cache.set(embedding, signature, reply)
+
 # ── Function dispatcher ───────────────────────────────────────────────────────
 
+# Value -> member lookups; arguments are schema-validated, so every value is present
+TYPE_MAP = {t.value: t for t in TaskType}
+STATUS_MAP = {s.value: s for s in TaskStatus}
+
+
+@lru_cache(maxsize=512)
 def _parse_date(value: str | None) -> date | None:
     return date.fromisoformat(value) if value else None
 
 
-def _dispatch(name: str, arguments: dict):
-    """Call the matching todo_service function and return a JSON-serialisable result."""
+async def _dispatch(name: str, arguments: dict):
+    """Call the matching todo_service function and return a JSON-serialisable result.
+
+    Raises ValueError (fastjsonschema.JsonSchemaValueException) if the
+    arguments don't match the tool's schema.
+    """
+    validate = VALIDATORS.get(name)
+    if validate is None:
+        raise ValueError(f"Unknown function: {name}")
+    validate(arguments)
+
     if name == "add_task":
-        arguments["type"] = TaskType(arguments["type"]) if "type" in arguments else TaskType.TASK
-        arguments["status"] = TaskStatus(arguments["status"]) if "status" in arguments else TaskStatus.PENDING
+        arguments["type"] = TYPE_MAP[arguments["type"]] if "type" in arguments else TaskType.TASK
+        arguments["status"] = STATUS_MAP[arguments["status"]] if "status" in arguments else TaskStatus.PENDING
         arguments["start_date"] = _parse_date(arguments.get("start_date"))
         arguments["due_date"] = _parse_date(arguments.get("due_date"))
         task = todo_service.add_task(**arguments)
@@ -159,17 +289,17 @@ def _dispatch(name: str, arguments: dict):
 
     elif name == "get_tasks":
         if "status" in arguments:
-            arguments["status"] = TaskStatus(arguments["status"])
+            arguments["status"] = STATUS_MAP[arguments["status"]]
         if "type" in arguments:
-            arguments["type"] = TaskType(arguments["type"])
+            arguments["type"] = TYPE_MAP[arguments["type"]]
         tasks = todo_service.get_tasks(**arguments)
         return [t.to_dict() for t in tasks]
 
     elif name == "update_task":
         if "type" in arguments:
-            arguments["type"] = TaskType(arguments["type"])
+            arguments["type"] = TYPE_MAP[arguments["type"]]
         if "status" in arguments:
-            arguments["status"] = TaskStatus(arguments["status"])
+            arguments["status"] = STATUS_MAP[arguments["status"]]
         arguments["start_date"] = _parse_date(arguments.get("start_date"))
         arguments["due_date"] = _parse_date(arguments.get("due_date"))
         # Remove None date values so update_task doesn't overwrite with None
@@ -181,67 +311,171 @@ def _dispatch(name: str, arguments: dict):
         task = todo_service.delete_task(**arguments)
         return task.to_dict()
 
-    raise ValueError(f"Unknown function: {name}")
+
+async def _dispatch_safe(name: str, raw_arguments: str):
+    """Parse the tool arguments and dispatch, reporting any failure as an error result."""
+    try:
+        return await _dispatch(name, orjson.loads(raw_arguments))
+    except Exception as exc:
+        return {"error": str(exc)}
+
+
+# ── Direct replies ────────────────────────────────────────────────────────────
+
+# Plain listing requests ("show my pending bugs") are the only queries rendered
+# locally. Every word must come from this vocabulary, so anything get_tasks can't
+# express (dates, urgency, ordering, questions) falls through to GPT.
+LISTING_VERBS = {"list", "show", "display", "get"}
+LISTING_NOUNS = {"task", "tasks", "todos", "items", "bugs", "features", "improvements"}
+LISTING_FILLERS = {"please", "me", "my", "all", "the", "current", "in"}
+LISTING_WORDS = LISTING_VERBS | LISTING_NOUNS | LISTING_FILLERS | FILTER_WORDS.keys()
+
+
+def _is_simple_query(query: str) -> bool:
+    """Return True only for plain "list/show my [status/type] tasks" requests."""
+    words = re.findall(r"[\w'-]+", query.lower())
+    if words[:1] == ["please"]:
+        words = words[1:]
+    return (
+        len(words) >= 2
+        and words[0] in LISTING_VERBS
+        and words[-1] in LISTING_NOUNS
+        and all(word in LISTING_WORDS for word in words)
+    )
+
+
+def _format_task(task: dict) -> str:
+    line = f"• {task['code']} – {task['title']} ({task['type']}, {task['status']})"
+    if task["due_date"]:
+        line += f", due {task['due_date']}"
+    return line
+
+
+def _summarize_tasks(tasks: list[dict]) -> str:
+    """Render a get_tasks result as a friendly reply without calling GPT."""
+    if not tasks:
+        return "You don't have any tasks matching that."
+    noun = "task" if len(tasks) == 1 else "tasks"
+    lines = "\n".join(_format_task(task) for task in tasks)
+    return f"You have {len(tasks)} {noun}:\n{lines}"
 
 
 # ── Agent ─────────────────────────────────────────────────────────────────────
 
-def agent(query: str, model: str = "gpt-4o-mini") -> str:
-    """Process a natural-language query about tasks.
+async def agent(query: str, model: str = "gpt-4o-mini") -> AsyncIterator[str]:
+    """Process a natural-language query about tasks, yielding the reply in chunks.
 
     1. Sends the query to GPT with the available tool schemas.
     2. Executes the function(s) GPT selects.
-    3. Sends the results back to GPT for a human-readable response.
-    4. Returns the final response string.
+    3. Streams GPT's human-readable response to the results, except for
+       plain task listings, which are rendered locally without a second call.
+    4. Answers without tools are yielded as a single chunk.
+
+    Replies that did not modify the task list are cached by exact query.
+    Direct answers (no tools) are also cached by embedding similarity so
+    paraphrases hit; tool-backed listings are not, since near-identical
+    phrasings ("done" vs "not done") can select different tasks. Any write
+    clears the caches so reads never return stale task data.
     """
+    key = LLMCache.make_key(model, SYSTEM_PROMPT, query, TOOLS_HASH)
+    cached = cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    generation = write_generation
+
     messages = [
-        {
-            "role": "system",
-            "content": (
-                "You are a helpful task management assistant. "
-                "Use the provided tools to manage the user's task list. "
-                "Always respond in clear, friendly language."
-            ),
-        },
+        {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": query},
     ]
 
     # ── First call: let GPT decide which tool(s) to use ──────────────────────
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        tools=TOOLS,
-        tool_choice="auto",
+    # Started before the embedding lookup so a semantic-cache miss costs no extra latency
+    first_call = asyncio.create_task(
+        client.chat.completions.create(
+            model=model,
+            messages=messages,
+            tools=TOOLS,
+            tool_choice="auto",
+        )
     )
 
+    try:
+        embedding = await _embed(query)
+    except BaseException:
+        first_call.cancel()  # e.g. the client disconnected; don't leave the call running
+        raise
+    signature = _query_signature(query, model)
+    cached = semantic_cache.get(embedding, signature) if embedding is not None else None
+    if cached is not None:
+        first_call.cancel()
+        yield cached
+        return
+
+    response = await first_call
+
     message = response.choices[0].message
-    messages.append(message)
+
+    # GPT answered directly without needing a tool
+    if not message.tool_calls:
+        reply = message.content or ""
+        _store_reply(key, reply, generation, embedding, signature)
+        yield reply
+        return
+
+    # Plain dict, so the SDK doesn't walk the pydantic model again on the next request
+    messages.append(message.model_dump(exclude_unset=True))
 
     # ── Execute every tool call GPT requested ────────────────────────────────
-    if message.tool_calls:
-        for tool_call in message.tool_calls:
-            name = tool_call.function.name
-            arguments = json.loads(tool_call.function.arguments)
-
-            try:
-                result = _dispatch(name, arguments)
-            except Exception as exc:
-                result = {"error": str(exc)}
-
-            messages.append(
-                {
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "content": json.dumps(result, default=str),
-                }
-            )
-
-        # ── Second call: GPT formulates the final human-readable response ────
-        followup = client.chat.completions.create(
+    # Tool calls run concurrently; todo_service is synchronous and in-memory,
+    # so each call completes without yielding and writes cannot interleave.
+    results = await asyncio.gather(
+        *(
+            _dispatch_safe(tool_call.function.name, tool_call.function.arguments)
+            for tool_call in message.tool_calls
+        )
+    )
+
+    for tool_call, result in zip(message.tool_calls, results):
+        messages.append(
+            {
+                "role": "tool",
+                "tool_call_id": tool_call.id,
+                "content": orjson.dumps(result).decode(),
+            }
+        )
+
+    read_only = all(tc.function.name in READ_ONLY_TOOLS for tc in message.tool_calls)
+    if not read_only:
+        _clear_caches()
+
+    direct = (
+        len(message.tool_calls) == 1
+        and message.tool_calls[0].function.name == "get_tasks"
+        and isinstance(results[0], list)
+        and not message.content  # GPT started a narrative answer; let it finish
+        and _is_simple_query(query)
+    )
+    if direct:
+        reply = _summarize_tasks(results[0])
+        yield reply
+    else:
+        # ── Second call: stream GPT's final human-readable response ──────────
+        stream = await client.chat.completions.create(
             model=model,
             messages=messages,
+            stream=True,
         )
-        return followup.choices[0].message.content
+        parts = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                parts.append(content)
+                yield content
+        reply = "".join(parts)
 
-    # GPT answered directly without needing a tool
-    return message.content
+    if read_only:
+        _store_reply(key, reply, generation)
@@ -0,0 +1,144 @@
+import hashlib
+import time
+
+import numpy as np
+
+
+class LLMCache:
+    """In-process exact-match cache for final agent replies.
+
+    Entries expire after ``ttl`` seconds. At most ``max_entries`` are kept;
+    when full, expired entries are swept and then the oldest are evicted.
+    Keys are opaque strings; use ``make_key`` to derive one from the inputs
+    that determine a reply.
+    """
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._store: dict[str, tuple[float, str]] = {}
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        expires_at, reply = entry
+        if expires_at < time.monotonic():
+            del self._store[key]
+            return None
+        return reply
+
+    def setex(self, key: str, ttl: float, reply: str) -> None:
+        self._store.pop(key, None)  # re-insert so the entry counts as newest
+        self._store[key] = (time.monotonic() + ttl, reply)
+        if len(self._store) > self.max_entries:
+            self._evict()
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in self._store.items() if expires_at < now]:
+            del self._store[key]
+        # Dicts keep insertion order, so the first keys are the oldest
+        while len(self._store) > self.max_entries:
+            del self._store[next(iter(self._store))]
+
+    def set(self, key: str, reply: str) -> None:
+        self.setex(key, self.ttl, reply)
+
+    def clear(self) -> None:
+        self._store.clear()
+
+
+class _SignatureBucket:
+    """Normalised embeddings, expiry times and replies for one signature.
+
+    Rows live in a preallocated matrix that doubles up to ``max_entries`` and
+    then acts as a ring buffer, so adding an entry never copies every row.
+    """
+
+    def __init__(self, dim: int, max_entries: int):
+        self.max_entries = max_entries
+        capacity = min(16, max_entries)
+        self.vectors = np.empty((capacity, dim), dtype=np.float32)
+        self.expires_at = np.empty(capacity)
+        self.replies: list[str] = []
+        self.next_slot = 0
+
+    def add(self, row: np.ndarray, expires_at: float, reply: str) -> None:
+        size = len(self.replies)
+        if size < self.max_entries:
+            if size == len(self.vectors):
+                capacity = min(2 * size, self.max_entries)
+                vectors = np.empty((capacity, self.vectors.shape[1]), dtype=np.float32)
+                vectors[:size] = self.vectors
+                expiries = np.empty(capacity)
+                expiries[:size] = self.expires_at
+                self.vectors, self.expires_at = vectors, expiries
+            self.replies.append(reply)
+        else:
+            self.replies[self.next_slot] = reply  # overwrite the oldest entry
+        slot = self.next_slot
+        self.vectors[slot] = row
+        self.expires_at[slot] = expires_at
+        self.next_slot = (slot + 1) % self.max_entries
+
+    def best(self, query: np.ndarray, now: float) -> tuple[float, str | None]:
+        size = len(self.replies)
+        scores = self.vectors[:size] @ query
+        scores[self.expires_at[:size] < now] = -np.inf
+        index = int(np.argmax(scores))
+        return float(scores[index]), self.replies[index]
+
+
+class SemanticCache:
+    """Cache of replies keyed by query embedding.
+
+    A lookup returns the reply of the most similar stored query when its
+    cosine similarity reaches ``threshold`` and its signature matches exactly.
+    The signature carries whatever embeddings blur but the reply depends on
+    (model, task codes, filter words). Entries expire after ``ttl`` seconds.
+    Each signature has its own normalised embedding matrix, so a lookup is a
+    dict access plus one matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        ttl: float = 3600,
+        max_entries: int = 1000,
+        max_signatures: int = 256,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_signatures = max_signatures
+        self._buckets: dict[str, _SignatureBucket] = {}
+
+    @staticmethod
+    def _normalise(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, vector, signature: str) -> str | None:
+        bucket = self._buckets.get(signature)
+        if bucket is None:
+            return None
+        score, reply = bucket.best(self._normalise(vector), time.monotonic())
+        return reply if score >= self.threshold else None
+
+    def set(self, vector, signature: str, reply: str) -> None:
+        row = self._normalise(vector)
+        bucket = self._buckets.get(signature)
+        if bucket is None:
+            if len(self._buckets) >= self.max_signatures:
+                del self._buckets[next(iter(self._buckets))]  # drop the oldest signature
+            bucket = self._buckets[signature] = _SignatureBucket(len(row), self.max_entries)
+        bucket.add(row, time.monotonic() + self.ttl, reply)
+
+    def clear(self) -> None:
+        self._buckets.clear()
@@ -1,13 +1,26 @@
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 
-from agent_service import agent
+from agent_service import agent, http_client
 
-app = FastAPI(title="Task Manager Agent")
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close pooled OpenAI connections; --reload re-imports agent_service with a new client
+    await http_client.aclose()
+
+
+app = FastAPI(title="Task Manager Agent", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,21 +34,26 @@ class MessageRequest(BaseModel):
     message: str
 
 
-class MessageResponse(BaseModel):
-    reply: str
-
-
 @app.get("/")
 def index():
     """Serve the chat UI."""
     return FileResponse(Path(__file__).parent / "chat_ui" / "index.html")
 
 
-@app.post("/chat", response_model=MessageResponse)
-def chat(request: MessageRequest) -> MessageResponse:
-    """Send a natural-language message to the task agent and get a response."""
-    reply = agent(request.message)
-    return MessageResponse(reply=reply)
+async def _stream_reply(message: str) -> AsyncIterator[str]:
+    """Relay the agent's reply; errors become a generic line, as the 200 status is already sent."""
+    try:
+        async for chunk in agent(message):
+            yield chunk
+    except Exception:
+        logger.exception("Agent failed while streaming a reply")
+        yield "\n⚠️ Sorry, something went wrong. Please try again."
+
+
+@app.post("/chat")
+async def chat(request: MessageRequest) -> StreamingResponse:
+    """Send a natural-language message to the task agent and stream back its response."""
+    return StreamingResponse(_stream_reply(request.message), media_type="text/plain")
 
 
 if __name__ == "__main__":
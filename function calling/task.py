@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date
 from enum import Enum
 
@@ -17,7 +17,7 @@ class TaskStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     code: str                          # Unique identifier, e.g. "TASK-001"
     title: str
@@ -27,13 +27,35 @@ class Task:
     due_date: date | None = None
     status: TaskStatus = TaskStatus.PENDING
 
+    # Lowercased copies of title/description for searching; kept fresh by refresh_cache()
+    _title_lc: str = field(init=False, repr=False, compare=False)
+    _description_lc: str = field(init=False, repr=False, compare=False)
+    # Last to_dict() result; dropped by refresh_cache() so it's rebuilt after a change
+    _dict: dict | None = field(init=False, repr=False, compare=False, default=None)
+
+    def __post_init__(self):
+        self.refresh_cache()
+
+    def refresh_cache(self) -> None:
+        """Recompute derived values; call after changing any field."""
+        self._title_lc = self.title.lower()
+        self._description_lc = self.description.lower()
+        self._dict = None
+
+    def matches(self, keyword: str) -> bool:
+        """Return True if the lowercase keyword occurs in the title or description."""
+        return keyword in self._title_lc or keyword in self._description_lc
+
     def to_dict(self) -> dict:
-        return {
-            "code": self.code,
-            "title": self.title,
-            "description": self.description,
-            "type": self.type.value,
-            "start_date": self.start_date.isoformat() if self.start_date else None,
-            "due_date": self.due_date.isoformat() if self.due_date else None,
-            "status": self.status.value,
-        }
+        """Return the task as a dict. The dict is shared between calls; don't mutate it."""
+        if self._dict is None:
+            self._dict = {
+                "code": self.code,
+                "title": self.title,
+                "description": self.description,
+                "type": self.type.value,
+                "start_date": self.start_date,
+                "due_date": self.due_date,
+                "status": self.status.value,
+            }
+        return self._dict
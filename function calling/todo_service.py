@@ -5,7 +5,22 @@ from task import Task, TaskStatus, TaskType
 
 # ── Storage ──────────────────────────────────────────────────────────────────
 
-tasks: list[Task] = []
+# Keyed by task code; dicts keep insertion order, so iteration order is creation order
+tasks: dict[str, Task] = {}
+
+# Secondary indexes: code -> Task for every task with a given status / type
+_by_status: dict[TaskStatus, dict[str, Task]] = {s: {} for s in TaskStatus}
+_by_type: dict[TaskType, dict[str, Task]] = {t: {} for t in TaskType}
+
+
+def _index(task: Task) -> None:
+    _by_status[task.status][task.code] = task
+    _by_type[task.type][task.code] = task
+
+
+def _unindex(task: Task) -> None:
+    del _by_status[task.status][task.code]
+    del _by_type[task.type][task.code]
 
 
 # ── Service functions ─────────────────────────────────────────────────────────
@@ -19,7 +34,18 @@ def add_task(
     due_date: date | None = None,
     status: TaskStatus = TaskStatus.PENDING,
 ) -> Task:
-    """Create a new Task and append it to the task list."""
+    """Create a new Task and add it to the task list.
+
+    Raises ValueError if a task with the given code already exists, or if
+    type/status is not a valid TaskType/TaskStatus.
+    """
+    if code in tasks:
+        raise ValueError(f"A task with code '{code}' already exists")
+
+    # Coerce up front so an invalid value fails before the task is stored or indexed
+    type = TaskType(type)
+    status = TaskStatus(status)
+
     task = Task(
         code=code,
         title=title,
@@ -29,7 +55,8 @@ def add_task(
         due_date=due_date,
         status=status,
     )
-    tasks.append(task)
+    tasks[code] = task
+    _index(task)
     return task
 
 
@@ -48,22 +75,23 @@ def get_tasks(
     Returns:
         A filtered list of Task objects.
     """
-    result = tasks
-
+    # Start from the smallest candidate pool the indexes can give us;
+    # a value that isn't a valid status/type matches no tasks
+    pools = [tasks]
     if status is not None:
-        result = [t for t in result if t.status == status]
-
+        pools.append(_by_status.get(status, {}))
     if type is not None:
-        result = [t for t in result if t.type == type]
+        pools.append(_by_type.get(type, {}))
+    candidates = min(pools, key=len).values()
 
-    if search is not None:
-        keyword = search.lower()
-        result = [
-            t for t in result
-            if keyword in t.title.lower() or keyword in t.description.lower()
-        ]
-
-    return result
+    # Apply every filter in a single pass instead of building a list per filter
+    keyword = search.lower() if search is not None else None
+    return [
+        t for t in candidates
+        if (status is None or t.status == status)
+        and (type is None or t.type == type)
+        and (keyword is None or t.matches(keyword))
+    ]
 
 
 def update_task(
@@ -78,25 +106,38 @@ def update_task(
     """Update fields of an existing task identified by its code.
 
     Only the provided (non-None) arguments are applied.
-    Raises ValueError if no task with the given code exists.
+    Raises ValueError if no task with the given code exists, or if
+    type/status is not a valid TaskType/TaskStatus.
     """
-    task = next((t for t in tasks if t.code == code), None)
+    task = tasks.get(code)
     if task is None:
         raise ValueError(f"No task found with code '{code}'")
 
-    if title is not None:
-        task.title = title
-    if description is not None:
-        task.description = description
+    # Coerce before unindexing so an invalid value leaves the indexes untouched
     if type is not None:
-        task.type = type
-    if start_date is not None:
-        task.start_date = start_date
-    if due_date is not None:
-        task.due_date = due_date
+        type = TaskType(type)
     if status is not None:
-        task.status = status
-
+        status = TaskStatus(status)
+
+    _unindex(task)
+    try:
+        if title is not None:
+            task.title = title
+        if description is not None:
+            task.description = description
+        if type is not None:
+            task.type = type
+        if start_date is not None:
+            task.start_date = start_date
+        if due_date is not None:
+            task.due_date = due_date
+        if status is not None:
+            task.status = status
+
+        task.refresh_cache()
+    finally:
+        # Always re-index, so a failure part-way never drops the task from the indexes
+        _index(task)
     return task
 
 
@@ -105,8 +146,8 @@ def delete_task(code: str) -> Task:
 
     Raises ValueError if no task with the given code exists.
     """
-    for index, task in enumerate(tasks):
-        if task.code == code:
-            tasks.pop(index)
-            return task
-    raise ValueError(f"No task found with code '{code}'")
+    task = tasks.pop(code, None)
+    if task is None:
+        raise ValueError(f"No task found with code '{code}'")
+    _unindex(task)
+    return task